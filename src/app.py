@@ -1,15 +1,129 @@
+import contextlib
+import math
+import os
+
 import pandas as pd
 import streamlit as st
 import numpy as np
 import plotly.express as px
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # load_data falls back to the pandas C parser
+    pa = pacsv = None
+
+# Copy-on-Write (pandas >= 2.0): slices and derived frames share buffers until written
+pd.set_option("mode.copy_on_write", True)
+
+DATA_PATH = "data/processed/processed-imports-exports.csv"
+
+# Timestamp layouts written by the processing notebook
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+# Layout of the processed sidecar written by load_data: bump whenever load_data
+# changes what it stores (columns, dtypes, sort order) so old sidecars are rebuilt
+SIDECAR_VERSION = 3
+
 st.set_page_config(
     page_title="France — Electricity Imports/Exports",
     layout="wide"
     )
 
-@st.cache_data(show_spinner=False)
-def load_data(path: str) -> pd.DataFrame:
+# Built once per process: kept out of the script body so reruns neither
+# re-import numba nor recompile the kernel
+@st.cache_resource(show_spinner=False)
+def partner_nets_kernel():
+    """
+    JIT-compiled partner_nets, or None when numba is not installed.
+
+    numba is imported on first use rather than at startup.
+    """
+
+    try:
+        from numba import njit
+    except ImportError:  # load_data keeps its NumPy path
+        return None
+
+    # Serial on purpose: Streamlit runs the script in a worker thread, where
+    # Numba's parallel threading layers can hang
+    @njit
+    def partner_nets(exports, imports, out_net, out_total):
+        """Per row: net_j = |export_j| - |import_j| (NaN as 0) and their row sum."""
+
+        for i in range(exports.shape[0]):
+            total = 0.0
+            for j in range(exports.shape[1]):
+                export_mwh = exports[i, j]
+                import_mwh = imports[i, j]
+                if np.isnan(export_mwh):
+                    export_mwh = 0.0
+                if np.isnan(import_mwh):
+                    import_mwh = 0.0
+                net = abs(export_mwh) - abs(import_mwh)
+                out_net[i, j] = net
+                total += net
+            out_total[i] = total
+
+    return partner_nets
+
+def grouped_sum(keys, values, n):
+    """float64 sums of values per integer key in [0, n)."""
+
+    # np.bincount: a JIT kernel saves well under a millisecond per call here
+    # but costs about a second of compilation per process
+    return np.bincount(keys, weights=values, minlength=n)
+
+def month_labels(dt: pd.Series) -> pd.Series:
+    """
+    Ordered categorical of 'YYYY-MM' labels for a datetime Series.
+
+    Each distinct month is formatted once and rows only hold integer codes; NaT maps to NaN.
+    """
+
+    months, codes = np.unique(dt.to_numpy().astype("datetime64[M]"), return_inverse=True)
+
+    # NaT sorts last in np.unique
+    if len(months) and np.isnat(months[-1]):
+        codes = np.where(codes == len(months) - 1, -1, codes)
+        months = months[:-1]
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories=months.astype(str), ordered=True), index=dt.index)
+
+def index_by_datetime(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rows with a valid datetime, sorted and indexed by it (column kept), with the
+    calendar keys the tabs group on as integers (year, day, hour, weekday) and the day as date.
+
+    The flow columns summed by aggregate() are listed once in attrs["agg_cols"], the
+    partner nets and the export/import columns in attrs["partner_cols"/"exp_cols"/"imp_cols"].
+    """
+
+    df_idx = df[df["datetime"].notna()].set_index("datetime", drop=False).sort_index(kind="stable")
+
+    # Decomposed once per load; every datetime is valid here, so no NaN forces floats
+    df_idx = df_idx.assign(
+        year=df_idx["datetime"].dt.year.astype(np.int16),
+        day=df_idx["datetime"].dt.day.astype(np.int8),
+        hour=df_idx["datetime"].dt.hour.astype(np.int8),
+        weekday=df_idx["datetime"].dt.weekday.astype(np.int8),
+        date=df_idx["datetime"].to_numpy().astype("datetime64[D]"),
+    )
+
+    df_idx.attrs["agg_cols"] = [
+        c for c in df_idx.columns
+        if c.startswith(("FR vers","GB vers","CH vers","IT vers","ES vers",
+                            "Export France","Import France","net_","FR->CWE","CWE/Core->FR"))
+    ]
+    df_idx.attrs["partner_cols"] = [c for c in df_idx.columns if c.startswith("net_") and c != "net_total"]
+    df_idx.attrs["exp_cols"] = [c for c in df_idx.columns if c.startswith("FR vers")]
+    df_idx.attrs["imp_cols"] = [c for c in df_idx.columns if c.endswith("vers FR (MWh)") or "->FR" in c]
+
+    return df_idx
+
+# Shared and never copied per rerun: callers must treat the frames as read-only
+@st.cache_resource(show_spinner=False)
+def load_data(path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Load the processed CSV and rebuild clean net flows:
 
@@ -19,17 +133,83 @@ def load_data(path: str) -> pd.DataFrame:
         net_GBR, net_CHE, net_ITA, net_ESP, net_CWE/Core
         as (exports_from_FR - imports_to_FR)
     - Recompute net_total as the sum of all net_* columns
-    - Rebuild date, year, month, day, hour
+    - Rebuild year, month, day, hour
+
+    Returns (df, df_idx): the full frame sorted by datetime, and the rows with
+    a valid datetime indexed by it, so periods are sliced instead of masked.
+
+    The full frame is also written to a Parquet sidecar
+    (``<path>.v<SIDECAR_VERSION>.parquet``), which is read instead of the CSV on
+    later cold starts while it is not older than the CSV. Sidecars written by
+    another version of load_data are ignored.
     """
 
-    # --- Load file ---
-    df = pd.read_csv(path, sep=";", encoding="utf-8", low_memory=False)
+    # --- Reuse the Parquet sidecar when it is up to date ---
+    parquet_path = f"{path}.v{SIDECAR_VERSION}.parquet"
+    if (
+        os.path.exists(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+    ):
+        try:
+            df = pd.read_parquet(parquet_path)
+        except (ImportError, OSError, ValueError):  # ArrowInvalid is a ValueError
+            pass  # unreadable (e.g. truncated): rebuild it from the CSV below
+        else:
+            return df, index_by_datetime(df)
+
+    # --- Partner flow configuration ---
+    partner_configs = {
+        "GBR": ("FR vers GB (MWh)", "GB vers FR (MWh)"),
+        "CHE": ("FR vers CH (MWh)", "CH vers FR (MWh)"),
+        "ITA": ("FR vers IT (MWh)", "IT vers FR (MWh)"),
+        "ESP": ("FR vers ES (MWh)", "ES vers FR (MWh)"),
+        "CWE/Core": ("FR->CWE/Core", "CWE/Core->FR"),
+    }
+
+    # Flow volumes are read straight as float32 (display-only MWh sums); the
+    # France totals are listed too since they may be entirely empty
+    flow_cols = [col for cols in partner_configs.values() for col in cols]
+    flow_cols += ["Export France (MWh)", "Import France (MWh)"]
+    flow_dtypes = {col: np.float32 for col in flow_cols}
+
+    # --- Load file (multithreaded Arrow CSV reader, pandas C parser as fallback) ---
+    if pacsv is not None:
+        # Types for columns absent from the file are simply ignored. 'datetime'
+        # stays text: Arrow would raise on a single malformed timestamp, so the
+        # coercing parse below turns those into NaT like the pandas path does
+        column_types = {col: pa.float32() for col in flow_cols}
+        column_types["datetime"] = pa.string()
+        # Raw 'Date' stays text too, as with the C parser: Arrow would infer date32,
+        # giving datetime.date objects that come back from Parquet as an object column
+        column_types["Date"] = pa.string()
+
+        table = pacsv.read_csv(
+            path,
+            parse_options=pacsv.ParseOptions(delimiter=";"),
+            convert_options=pacsv.ConvertOptions(column_types=column_types),
+        )
+        df = table.to_pandas()
+    else:
+        # Parse 'datetime' during the read when the header has it (legacy files don't)
+        header = pd.read_csv(path, sep=";", encoding="utf-8", nrows=0).columns
+        date_options = (
+            {"parse_dates": ["datetime"], "date_format": DATETIME_FORMAT}
+            if "datetime" in header else {}
+        )
+        df = pd.read_csv(path, sep=";", encoding="utf-8", low_memory=False,
+                         dtype=flow_dtypes, **date_options)
+
+    # Downcast the remaining float64 columns (totals, source time fields)
+    float_cols = df.select_dtypes("float64").columns
+    df[float_cols] = df[float_cols].astype(np.float32)
 
     # --- Parse datetime ---
     if "datetime" in df.columns:
-        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+        # Text from the Arrow reader, or left unparsed by read_csv: coerce, bad values -> NaT
+        if not pd.api.types.is_datetime64_any_dtype(df["datetime"]):
+            df["datetime"] = pd.to_datetime(df["datetime"], format=DATETIME_FORMAT, errors="coerce")
     elif "Date" in df.columns and "Tranche horaire du programme d'échange" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        df["Date"] = pd.to_datetime(df["Date"], format=DATE_FORMAT, errors="coerce")
         df["hour"] = (
             df["Tranche horaire du programme d'échange"]
             .astype(float)
@@ -52,68 +232,296 @@ def load_data(path: str) -> pd.DataFrame:
     if old_net_cols:
         df = df.drop(columns=old_net_cols)
 
-    # --- Partner flow configuration ---
-    partner_configs = {
-        "GBR": ("FR vers GB (MWh)", "GB vers FR (MWh)"),
-        "CHE": ("FR vers CH (MWh)", "CH vers FR (MWh)"),
-        "ITA": ("FR vers IT (MWh)", "IT vers FR (MWh)"),
-        "ESP": ("FR vers ES (MWh)", "ES vers FR (MWh)"),
-        "CWE/Core": ("FR->CWE/Core", "CWE/Core->FR"),
-    }
-
     # --- Recompute partner-level net flows, with imports as positive volumes ---
-    for code, (exp_col, imp_col) in partner_configs.items():
-        if exp_col in df.columns and imp_col in df.columns:
-            export_mwh = df[exp_col].fillna(0.0).abs()
-            import_mwh = df[imp_col].fillna(0.0).abs()
-
-            # net = exports_from_FR - imports_to_FR
-            net_col = f"net_{code}"
-            df[net_col] = export_mwh - import_mwh
-
-    # --- Recompute net_total as the sum of all partner net_* columns ---
-    net_cols = [c for c in df.columns if c.startswith("net_")]
+    available = {
+        code: cols for code, cols in partner_configs.items()
+        if cols[0] in df.columns and cols[1] in df.columns
+    }
 
-    if not net_cols:
+    if not available:
         raise RuntimeError(
             "No net_* columns could be constructed – "
             "check that the expected export/import columns exist."
         )
 
-    df["net_total"] = df[net_cols].sum(axis=1)
+    # (rows x partners) matrices
+    export_mwh = df[[exp_col for exp_col, _ in available.values()]].to_numpy(dtype=np.float32, copy=True)
+    import_mwh = df[[imp_col for _, imp_col in available.values()]].to_numpy(dtype=np.float32, copy=True)
+
+    # One contiguous float32 block: a column per partner net_* followed by net_total
+    net_cols = [f"net_{code}" for code in available]
+    nets = np.empty((len(df), len(net_cols) + 1), dtype=np.float32, order="F")
+
+    # net = exports_from_FR - imports_to_FR; net_total = sum of all partner nets
+    partner_nets = partner_nets_kernel()
+    if partner_nets is not None:
+        partner_nets(export_mwh, import_mwh, nets[:, :-1], nets[:, -1])
+    else:
+        # NaN -> 0 and fabs in place, then subtract straight into the block
+        np.fabs(np.nan_to_num(export_mwh, copy=False, nan=0.0), out=export_mwh)
+        np.fabs(np.nan_to_num(import_mwh, copy=False, nan=0.0), out=import_mwh)
+        np.subtract(export_mwh, import_mwh, out=nets[:, :-1])
+        nets[:, :-1].sum(axis=1, out=nets[:, -1])
+
+    df = pd.concat(
+        [df, pd.DataFrame(nets, columns=net_cols + ["net_total"], index=df.index, copy=False)],
+        axis=1,
+    )
 
     # --- Rebuild time breakdown columns from datetime ---
-    df["date"] = df["datetime"].dt.date
-    df["year"] = df["datetime"].dt.year
-    df["month"] = df["datetime"].dt.to_period("M").astype(str)
-    df["day"] = df["datetime"].dt.day
-    df["hour"] = df["datetime"].dt.hour
+    # float32 rather than float64: NaT rows need NaN, and small integers stay exact
+    df["year"] = df["datetime"].dt.year.astype(np.float32)
+    df["month"] = month_labels(df["datetime"])
+    df["day"] = df["datetime"].dt.day.astype(np.float32)
+    df["hour"] = df["datetime"].dt.hour.astype(np.float32)
+
+    # --- Store repeated string labels (raw Date, month) as categoricals ---
+    obj_cols = df.select_dtypes("object").columns
+    df[obj_cols] = df[obj_cols].astype("category")
+
+    df = df.sort_values("datetime", kind="stable", ignore_index=True)
+
+    # --- Write the Parquet sidecar (best effort, e.g. read-only deployments) ---
+    # Written next to it under a temporary name, then swapped in atomically, so an
+    # interrupted or failed write never leaves a truncated sidecar at parquet_path
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, parquet_path)
+    except (ImportError, OSError):
+        pass
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+    return df, index_by_datetime(df)
+
+def filter_period(df_idx: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    """Rows of the datetime-indexed frame within [start_date, end_date]."""
+
+    # Binary search on the sorted index; [start, end + 1 day) keeps the whole end day
+    lo, hi = df_idx.index.searchsorted(
+        [pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)]
+    )
 
-    return df
+    return df_idx.iloc[lo:hi]
+
+def period_frame(start_date, end_date) -> pd.DataFrame:
+    """Datetime-indexed rows of the cached dataset within [start_date, end_date]."""
+
+    return filter_period(load_data(DATA_PATH)[1], start_date, end_date)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def aggregate(start_date, end_date, freq: str) -> pd.DataFrame:
+    """Resample the selected period by frequency on datetime (H, D, W, M).
+
+    Keyed on (start_date, end_date, freq) only: the full frame comes from the
+    cached load_data, so identical views skip the resample entirely.
+    """
+
+    df = period_frame(start_date, end_date)
 
-def aggregate(df: pd.DataFrame, freq: str) -> pd.DataFrame:
-    """Resample by frequency on datetime (H, D, W, M)."""
-    
     agg = (
-        df.set_index("datetime")
+        df[df.attrs["agg_cols"]]
         .resample(freq)
-        .agg({c: "sum" for c in df.columns
-                if c.startswith(("FR vers","GB vers","CH vers","IT vers","ES vers",
-                                    "Export France","Import France","net_","FR->CWE","CWE/Core->FR"))})
+        .sum()
         .reset_index()
     )
     
-    agg["date"] = agg["datetime"].dt.date
-    
-    agg["month"] = agg["datetime"].dt.to_period("M").astype(str)
+    agg["month"] = month_labels(agg["datetime"])
     
     agg["year"] = agg["datetime"].dt.year
     
     return agg
 
+# Derived frames behind the charts, cached on the period like aggregate()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def partner_totals(start_date, end_date) -> pd.DataFrame:
+    """Cumulative net balance per partner over the period, largest first."""
+
+    monthly = aggregate(start_date, end_date, "M")
+    
+    monthly_tot = monthly[[c for c in monthly.columns if c.startswith("net_")]].sum().sort_values(ascending=False).reset_index()
+    
+    monthly_tot.columns = ["Partner","Balance (MWh)"]
+    
+    monthly_tot["Partner"] = monthly_tot["Partner"].str.slice(4)
+
+    return monthly_tot
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def day_hour_heatmap(start_date, end_date) -> pd.DataFrame:
+    """Net balance summed per (day, hour): one row per day, one column per hour."""
+
+    df_f = period_frame(start_date, end_date)
+
+    # Dense (day code, hour) cells: missing hours of a present day sum to 0
+    days, day_code = np.unique(df_f["date"].to_numpy().astype("datetime64[D]"), return_inverse=True)
+    hour = df_f["hour"].to_numpy(dtype=np.intp)
+
+    sums = grouped_sum(day_code * 24 + hour, df_f["net_total"].to_numpy(), len(days) * 24).reshape(-1, 24)
+    hours = np.flatnonzero(np.bincount(hour, minlength=24))
+
+    return pd.DataFrame(sums[:, hours].astype(df_f["net_total"].dtype),
+                        index=pd.Index(days, name="datetime"), columns=hours)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def weekday_hour_profile(start_date, end_date) -> pd.DataFrame:
+    """Average net balance per weekday (Mon..Sun rows) and hour (columns)."""
+
+    base = period_frame(start_date, end_date)
+
+    # Flat weekday*24 + hour cell index: one bincount pass for the sums, one for the counts
+    cell = base["weekday"].to_numpy(dtype=np.intp) * 24 + base["hour"].to_numpy(dtype=np.intp)
+    sums = grouped_sum(cell, base["net_total"].to_numpy(), 7 * 24)
+    counts = np.bincount(cell, minlength=7 * 24)
+
+    # Cells without any sample stay NaN, as with groupby().mean()
+    means = np.divide(sums, counts, out=np.full(7 * 24, np.nan), where=counts > 0).reshape(7, 24)
+
+    # Every weekday row is kept, but only hours that occur in the period
+    hours = np.flatnonzero(counts.reshape(7, 24).sum(axis=0))
+
+    # Back to the column's float32 so the text_auto cell labels keep their precision
+    return pd.DataFrame(means[:, hours].astype(np.float32),
+                        index=["Mon","Tue","Wed","Thu","Fri","Sat","Sun"],
+                        columns=pd.Index(hours, name="hour"))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def partner_correlation(start_date, end_date) -> pd.DataFrame:
+    """Pearson correlation between the partners' net_* balances."""
+
+    base = period_frame(start_date, end_date)
+
+    partner_cols = base.attrs["partner_cols"]
+
+    # Standardize a float32 copy in place; one SGEMM then gives every pair at once.
+    # The nets carry no NaN (missing flows count as 0), so no pairwise masking is needed.
+    flows = base[partner_cols].to_numpy(dtype=np.float32, copy=True)
+    flows -= flows.mean(axis=0, dtype=np.float64).astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):  # constant partner -> NaN row, like .corr()
+        flows /= flows.std(axis=0, dtype=np.float64).astype(np.float32)
+
+    corr = (flows.T @ flows) / np.float32(len(flows))
+
+    # float32 rounding can land just past +-1; the diagonal is exactly 1 as with .corr()
+    np.clip(corr, -1, 1, out=corr)
+    np.fill_diagonal(corr, np.where(np.isnan(np.diagonal(corr)), np.nan, 1))
+
+    return pd.DataFrame(corr, index=partner_cols, columns=partner_cols)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def daily_net(start_date, end_date) -> pd.DataFrame:
+    """Daily net balance (datetime, net_total), days without data included as 0."""
+
+    df_f = period_frame(start_date, end_date)
+
+    if df_f.empty:
+        return df_f["net_total"].resample("D").sum().reset_index()
+
+    day = df_f["date"].to_numpy().astype("datetime64[D]")
+    day_code = (day - day[0]).astype(np.int64)
+    n_days = int(day_code[-1]) + 1
+
+    return pd.DataFrame({
+        "datetime": (day[0] + np.arange(n_days)).astype("datetime64[ns]"),
+        "net_total": grouped_sum(day_code, df_f["net_total"].to_numpy(), n_days),
+    })
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def rolling_net(start_date, end_date) -> pd.DataFrame:
+    """7-day rolling mean of the daily net balance (datetime, net_total)."""
+
+    daily = daily_net(start_date, end_date)
+
+    # Trailing window sums from one float64 cumsum, same as rolling(7, min_periods=1).mean()
+    csum = np.cumsum(daily["net_total"].to_numpy(), dtype=np.float64)
+    window = csum.copy()
+    window[7:] -= csum[:-7]
+    counts = np.minimum(np.arange(1, len(csum) + 1), 7)
+
+    return daily.assign(net_total=window / counts)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def yearly_partner_nets(start_date, end_date) -> pd.DataFrame:
+    """Net balance per year (rows) and partner net_* column."""
+
+    base = period_frame(start_date, end_date)
+
+    partner_cols = base.attrs["partner_cols"]
+
+    return (
+        base
+        .groupby("year")[partner_cols]
+        .sum()
+        .reset_index()
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def partner_abs_totals(start_date, end_date) -> pd.Series:
+    """Sum of |net| per partner net_* column over the period."""
+
+    base = period_frame(start_date, end_date)
+
+    partner_cols = base.attrs["partner_cols"]
+
+    return pd.Series(np.abs(base[partner_cols].to_numpy()).sum(axis=0, dtype=np.float64), index=partner_cols)
+
+@st.cache_data(show_spinner=False)
+def dataset_stats(path: str) -> dict:
+    """Coverage figures of the full dataset for the Methodology tab, computed once per file."""
+
+    df = load_data(path)[0]
+
+    return {
+        "nb_dups": int(df.duplicated().sum()),
+        "min_dt": df["datetime"].min(),
+        "max_dt": df["datetime"].max(),
+        "min_net": df["net_total"].min(),
+        "max_net": df["net_total"].max(),
+    }
+
+def m4_downsample(frame: pd.DataFrame, y: str, n_px: int = 1600) -> pd.DataFrame:
+    """M4 downsampling: keep the first, last, min and max row of each pixel-wide bucket."""
+
+    n = len(frame)
+    if n <= 4 * n_px:
+        return frame
+
+    # Power-of-two bucket width: the bucket edges stay put across small range changes
+    width = 1 << int(np.log2(n / n_px))
+    starts = np.arange(0, n, width)
+
+    values = np.full(len(starts) * width, np.nan)
+    values[:n] = frame[y].to_numpy(dtype=np.float64)
+    values = values.reshape(-1, width)
+
+    idx = np.concatenate([
+        starts,
+        np.minimum(starts + width - 1, n - 1),
+        starts + np.argmin(np.where(np.isnan(values), np.inf, values), axis=1),
+        starts + np.argmax(np.where(np.isnan(values), -np.inf, values), axis=1),
+    ])
+
+    return frame.iloc[np.unique(np.minimum(idx, n - 1))]
+
+def tab_is_open(tab) -> bool:
+    """
+    True for the selected tab, and for every tab when Streamlit does not track them
+    (older releases) or when no Streamlit runtime exists (bare ``python app.py``),
+    where ``.open`` reports every tab as closed.
+    """
+
+    if not st.runtime.exists():
+        return True
+
+    return getattr(tab, "open", None) is not False
+
 def format_mwh(x):
     
-    if pd.isna(x):
+    # Scalar-only: math.isnan is far cheaper than pandas' isna dispatch
+    if x is None or (isinstance(x, (float, np.floating)) and math.isnan(x)):
         return "—"
     
     abs_x = abs(x)
@@ -158,7 +566,7 @@ and junior traders/analysts interested in European cross-border flows.
 with st.sidebar:
     st.header("Filters")
     
-    df = load_data("data/processed/processed-imports-exports.csv")
+    df, df_idx = load_data(DATA_PATH)
     
     min_d, max_d = df["datetime"].min().date(), df["datetime"].max().date()
     
@@ -174,566 +582,535 @@ with st.sidebar:
     selected = st.multiselect("Partners", partenaires, default=partenaires)
 
 # Filter period
-mask = (df["date"] >= pd.to_datetime(date_range[0]).date()) & (df["date"] <= pd.to_datetime(date_range[1]).date())
+start_date, end_date = date_range[0], date_range[1]
 
-df_f = df.loc[mask].copy()
+df_f = filter_period(df_idx, start_date, end_date)
 
-agg = aggregate(df_f, freq)
+agg = aggregate(start_date, end_date, freq)
 
-# Global KPIs
-exp_cols = [c for c in agg.columns if c.startswith("FR vers")]
+# Column groups resolved once per dataset (see index_by_datetime)
+partner_cols = df_idx.attrs["partner_cols"]
+exp_cols = df_idx.attrs["exp_cols"]
+imp_cols = df_idx.attrs["imp_cols"]
 
-imp_cols = [c for c in agg.columns if c.endswith("vers FR (MWh)") or "->FR" in c]
+# Global KPIs
 
-total_export = agg[exp_cols].sum().sum() if exp_cols else np.nan
+# Single NumPy reductions, accumulated in float64 over the float32 columns
+total_export = float(np.nansum(agg[exp_cols].to_numpy(), dtype=np.float64)) if exp_cols else np.nan
 
-total_import = agg[imp_cols].sum().sum() if imp_cols else np.nan
+total_import = float(np.nansum(agg[imp_cols].to_numpy(), dtype=np.float64)) if imp_cols else np.nan
 
-net_total = agg["net_total"].sum() if "net_total" in agg.columns else np.nan
+net_total = float(agg["net_total"].to_numpy().sum(dtype=np.float64)) if "net_total" in agg.columns else np.nan
 
 # ======================
 # === Tabs UI ==========
 # ======================
-tab_dash, tab_adv, tab_geo, tab_meth = st.tabs(["📈 Dashboard", "🔎 Advanced Analytics", "🗺️ Geo Flows", "🧭 Methodology"])
+tab_labels = ["📈 Dashboard", "🔎 Advanced Analytics", "🗺️ Geo Flows", "🧭 Methodology"]
+
+try:
+    # Lazy tabs: switching tabs reruns the script and only the selected tab's body executes
+    tab_dash, tab_adv, tab_geo, tab_meth = st.tabs(tab_labels, on_change="rerun")
+except TypeError:  # older Streamlit: every tab renders on each rerun
+    tab_dash, tab_adv, tab_geo, tab_meth = st.tabs(tab_labels)
 
 
 # ----------------------
 # 📈 Dashboard
 # ----------------------
-with tab_dash:
-    col1, col2, col3 = st.columns(3)
+if tab_is_open(tab_dash):
+    with tab_dash:
+        col1, col2, col3 = st.columns(3)
     
-    col1.metric("Cumulative Export", format_mwh(total_export))
-    col2.metric("Cumulative Import", format_mwh(total_import))
-    col3.metric("Net Balance", format_mwh(net_total), delta=None)
+        col1.metric("Cumulative Export", format_mwh(total_export))
+        col2.metric("Cumulative Import", format_mwh(total_import))
+        col3.metric("Net Balance", format_mwh(net_total), delta=None)
 
-    # Net balance time series
-    ts = agg[["datetime","net_total"]].rename(columns={"net_total":"Net Balance (MWh)"})
+        # Net balance time series
+        ts = m4_downsample(agg[["datetime","net_total"]], "net_total").rename(columns={"net_total":"Net Balance (MWh)"})
     
-    fig_net = px.line(ts, x="datetime", y="Net Balance (MWh)", title="Net Balance Over Time")
+        fig_net = px.line(ts, x="datetime", y="Net Balance (MWh)", title="Net Balance Over Time")
     
-    fig_net.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_net.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_net, use_container_width=True)
+        st.plotly_chart(fig_net, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Net Balance Over Time**  
-    This line chart shows the **net exchange balance** (exports - imports) over time.
+        st.markdown("""
+        **Analysis — Net Balance Over Time**  
+        This line chart shows the **net exchange balance** (exports - imports) over time.
 
-    - A **persistent surplus** (above 0) indicates that France is acting as a **structural exporter**, with comfortable generation margins.  
-    - Periods dropping **close to or below zero** signal **stress on the system**, where France becomes a **net importer**.  
-    - The deep negative episode around 2021-2022 stands out as an **exceptional imbalance**, consistent with large nuclear outages and tight European markets.  
+        - A **persistent surplus** (above 0) indicates that France is acting as a **structural exporter**, with comfortable generation margins.  
+        - Periods dropping **close to or below zero** signal **stress on the system**, where France becomes a **net importer**.  
+        - The deep negative episode around 2021-2022 stands out as an **exceptional imbalance**, consistent with large nuclear outages and tight European markets.  
 
-    Use the **granularity selector (H/D/W/M)** and **date filter** to zoom from detailed volatility to long-term system regimes.
-    """)
+        Use the **granularity selector (H/D/W/M)** and **date filter** to zoom from detailed volatility to long-term system regimes.
+        """)
 
-    # Stacked area by partner (net)
-    net_cols = [f"net_{p}" for p in selected if f"net_{p}" in agg.columns]
+        # Stacked area by partner (net)
+        net_cols = [f"net_{p}" for p in selected if f"net_{p}" in agg.columns]
     
-    if net_cols:
-        area_df = agg[["datetime"] + net_cols].copy()
+        if net_cols:
+            # Wide form: one trace per partner column, no melted copy. Columns are
+            # renamed up front so legend and hover both read GBR rather than net_GBR
+            area_df = agg[["datetime"] + net_cols].rename(columns={c: c[4:] for c in net_cols})
+            fig_area = px.area(area_df, x="datetime", y=[c[4:] for c in net_cols],
+                                labels={"value": "MWh", "variable": "Partner"},
+                                title="Partners' Contribution to Net Balance")
         
-        area_long = area_df.melt(id_vars="datetime", var_name="Partner", value_name="MWh")
-        area_long["Partner"] = area_long["Partner"].replace("net_","", regex=False)
-        
-        fig_area = px.area(area_long, x="datetime", y="MWh", color="Partner",
-                            title="Partners' Contribution to Net Balance")
-        
-        fig_area.update_layout(
-            title_font=dict(size=26)
-        )
+            fig_area.update_layout(
+                title_font=dict(size=26)
+            )
         
-        st.plotly_chart(fig_area, use_container_width=True)
+            st.plotly_chart(fig_area, use_container_width=True)
         
-    st.markdown("""
-    **Analysis — Contribution by Partner**  
-    This stacked area chart decomposes the **overall net balance** into **bilateral contributions**.
+        st.markdown("""
+        **Analysis — Contribution by Partner**  
+        This stacked area chart decomposes the **overall net balance** into **bilateral contributions**.
 
-    - Thick **positive bands** show partners to whom France is a **structural exporter** (they absorb French surplus).  
-    - Bands dipping **below zero** correspond to partners that **supply France** during tight periods.  
-    - The relative thickness and color of each area highlight which borders dominate in **normal times** vs during **crisis episodes** (for example in 2021–2022).
+        - Thick **positive bands** show partners to whom France is a **structural exporter** (they absorb French surplus).  
+        - Bands dipping **below zero** correspond to partners that **supply France** during tight periods.  
+        - The relative thickness and color of each area highlight which borders dominate in **normal times** vs during **crisis episodes** (for example in 2021–2022).
 
-    Toggling partners on/off helps isolate **which neighbors drive the most change** when the system flips between surplus and deficit.
-    """)
+        Toggling partners on/off helps isolate **which neighbors drive the most change** when the system flips between surplus and deficit.
+        """)
 
-    # Cumulative bars by partner
-    monthly = aggregate(df_f, "M")
+        # Cumulative bars by partner
+        monthly_tot = partner_totals(start_date, end_date)
     
-    monthly_tot = monthly[[c for c in monthly.columns if c.startswith("net_")]].sum().sort_values(ascending=False).reset_index()
-    
-    monthly_tot.columns = ["Partner","Balance (MWh)"]
+        fig_bar = px.bar(monthly_tot, x="Partner", y="Balance (MWh)",
+                        title="Cumulative Net Balance by Partner (Filtered Period)")
     
-    monthly_tot["Partner"] = monthly_tot["Partner"].str.replace("net_","", regex=False)
-    
-    fig_bar = px.bar(monthly_tot, x="Partner", y="Balance (MWh)",
-                    title="Cumulative Net Balance by Partner (Filtered Period)")
-    
-    fig_bar.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_bar.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(fig_bar, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Cumulative Balance by Partner**  
-    This ranking aggregates flows over the **selected period** to reveal France’s **structural relationships**.
+        st.markdown("""
+        **Analysis — Cumulative Balance by Partner**  
+        This ranking aggregates flows over the **selected period** to reveal France’s **structural relationships**.
 
-    - Bars **above zero** correspond to partners that **buy net electricity from France** over the period.  
-    - Bars **below zero** highlight partners that are **net suppliers to France**.  
-    - The relative height of each bar shows how much each border contributes to shaping France’s **overall external position**.
+        - Bars **above zero** correspond to partners that **buy net electricity from France** over the period.  
+        - Bars **below zero** highlight partners that are **net suppliers to France**.  
+        - The relative height of each bar shows how much each border contributes to shaping France’s **overall external position**.
 
-    This view answers a simple question: *“Over this timeframe, who is France really exporting to, and who is it relying on when the system is tight?”*
-    """)
+        This view answers a simple question: *“Over this timeframe, who is France really exporting to, and who is it relying on when the system is tight?”*
+        """)
 
-    # Heatmap hour x day
-    heat = df_f.pivot_table(index=df_f["datetime"].dt.date,
-                            columns=df_f["datetime"].dt.hour,
-                            values="net_total", aggfunc="sum").fillna(0)
+        # Heatmap hour x day
+        heat = day_hour_heatmap(start_date, end_date)
     
-    heat_long = heat.reset_index().melt(id_vars="datetime", var_name="Hour", value_name="MWh")
-    heat_long.rename(columns={"datetime":"Day"}, inplace=True)
+        fig_heat = px.imshow(heat, aspect="auto",
+                                labels={"x": "Hour", "y": "Day", "color": "MWh"},
+                                title="Net Balance Heatmap (Hour x Day)")
     
-    fig_heat = px.density_heatmap(heat_long, x="Hour", y="Day", z="MWh", nbinsx=24,
-                                    title="Net Balance Heatmap (Hour x Day)")
-    
-    fig_heat.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_heat.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_heat, use_container_width=True)
+        st.plotly_chart(fig_heat, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Intra-day Patterns**  
-    This heatmap displays the **hour-by-hour net balance** for each day.
+        st.markdown("""
+        **Analysis — Intra-day Patterns**  
+        This heatmap displays the **hour-by-hour net balance** for each day.
 
-    - Darker bands indicate hours where exports are structurally **higher**; lighter or inverted colours correspond to moments of **weaker exports or imports**.  
-    - Morning and evening periods typically align with **demand ramps** across Europe, where cross-border exchanges intensify.  
-    - Changes in the colour pattern over certain years highlight **unusual operating conditions** (for example, when France temporarily loses its historical export profile).
+        - Darker bands indicate hours where exports are structurally **higher**; lighter or inverted colours correspond to moments of **weaker exports or imports**.  
+        - Morning and evening periods typically align with **demand ramps** across Europe, where cross-border exchanges intensify.  
+        - Changes in the colour pattern over certain years highlight **unusual operating conditions** (for example, when France temporarily loses its historical export profile).
 
-    Scanning vertically reveals **daily profiles**, while scanning horizontally reveals how those profiles evolve over the **years**.
-    """)
+        Scanning vertically reveals **daily profiles**, while scanning horizontally reveals how those profiles evolve over the **years**.
+        """)
 
 
 # ----------------------
 # 🔎 Advanced Analytics
 # ----------------------
-with tab_adv:
-    base = df_f.copy()
-
-
-    # 1) Net distribution
-    fig_dist = px.histogram(base, x="net_total", nbins=60, marginal="violin",
-                            title="Net Balance Distribution (MWh)")
+if tab_is_open(tab_adv):
+    with tab_adv:
+        # 1) Net distribution
+        fig_dist = px.histogram(df_f, x="net_total", nbins=60, marginal="violin",
+                                title="Net Balance Distribution (MWh)")
     
-    fig_dist.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_dist.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_dist, use_container_width=True)
+        st.plotly_chart(fig_dist, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Distribution of Net Balance**  
-    This distribution describes the **shape and dispersion** of France's net balance.
+        st.markdown("""
+        **Analysis — Distribution of Net Balance**  
+        This distribution describes the **shape and dispersion** of France's net balance.
 
-    - The central bulk of the histogram corresponds to **typical operating regimes**, where France exports moderately.  
-    - The long **right-hand tail** reflects episodes of **very high exports**, usually when generation is abundant and demand is moderate.  
-    - The **left-hand side** captures **import situations**: rare but sometimes very large negative values point to **stress events** in the system.
+        - The central bulk of the histogram corresponds to **typical operating regimes**, where France exports moderately.  
+        - The long **right-hand tail** reflects episodes of **very high exports**, usually when generation is abundant and demand is moderate.  
+        - The **left-hand side** captures **import situations**: rare but sometimes very large negative values point to **stress events** in the system.
 
-    Reading this chart is key for **risk analysis**: the wider and more skewed the distribution, the greater the exposure to extreme import needs.
-    """)
+        Reading this chart is key for **risk analysis**: the wider and more skewed the distribution, the greater the exposure to extreme import needs.
+        """)
 
 
-    # 2) Seasonal boxplot
-    base["month_str"] = base["datetime"].dt.to_period("M").astype(str)
+        # 2) Seasonal boxplot
+        fig_box = px.box(df_f, x="month", y="net_total",
+                        title="Seasonality: Monthly Net Balance Boxplot",
+                        labels={"month":"Month","net_total":"MWh"})
     
-    fig_box = px.box(base, x="month_str", y="net_total",
-                    title="Seasonality: Monthly Net Balance Boxplot",
-                    labels={"month_str":"Month","net_total":"MWh"})
-    
-    fig_box.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_box.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_box, use_container_width=True)
+        st.plotly_chart(fig_box, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Monthly Seasonality**  
-    Each box summarises the **monthly distribution** of the net balance across all years.
-
-    - Winter months tend to show **lower or more volatile net balances**, sometimes dipping into negative territory as domestic demand peaks.  
-    - Summer months generally display **higher and more stable exports**, consistent with lower demand and solid generation.  
-    - Outliers highlight **exceptional months**, often linked to extreme weather, large outages or major market events.
-
-    This seasonal view reveals the **recurring rhythm** of the French power system and helps explain why certain periods are structurally more fragile.
-    """)
+        st.markdown("""
+        **Analysis — Monthly Seasonality**  
+        Each box summarises the **monthly distribution** of the net balance across all years.
 
+        - Winter months tend to show **lower or more volatile net balances**, sometimes dipping into negative territory as domestic demand peaks.  
+        - Summer months generally display **higher and more stable exports**, consistent with lower demand and solid generation.  
+        - Outliers highlight **exceptional months**, often linked to extreme weather, large outages or major market events.
 
-    # 3) Weekday-hour heatmap
-    base["weekday"] = base["datetime"].dt.weekday
-    base["hour"] = base["datetime"].dt.hour
+        This seasonal view reveals the **recurring rhythm** of the French power system and helps explain why certain periods are structurally more fragile.
+        """)
 
-    wh = base.pivot_table(
-        index="weekday",
-        columns="hour",
-        values="net_total",
-        aggfunc="mean"
-    ).reindex([0,1,2,3,4,5,6])
 
-    wh.index = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
+        # 3) Weekday-hour heatmap
+        wh = weekday_hour_profile(start_date, end_date)
 
-    fig_wh = px.imshow(
-        wh,
-        aspect="auto",
-        title="Average Heatmap — Weekday x Hour (MWh)",
-        text_auto=True
-    )
+        fig_wh = px.imshow(
+            wh,
+            aspect="auto",
+            title="Average Heatmap — Weekday x Hour (MWh)",
+            text_auto=True
+        )
     
-    fig_wh.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_wh.update_layout(
+            title_font=dict(size=26)
+        )
 
-    st.plotly_chart(fig_wh, use_container_width=True)
+        st.plotly_chart(fig_wh, use_container_width=True)
 
-    st.markdown("""
-    **Analysis — Weekly Operational Profile**  
-    This matrix shows the **average net balance** for each combination of **weekday and hour**.
+        st.markdown("""
+        **Analysis — Weekly Operational Profile**  
+        This matrix shows the **average net balance** for each combination of **weekday and hour**.
 
-    - Weekday daytimes (especially Tuesday - Thursday) concentrate the **highest export levels**, reflecting strong industrial and commercial activity in neighbouring systems.  
-    - Nights (roughly 00:00 - 06:00) are flatter, with more modest exchanges, as overall European demand is lower.  
-    - Weekends keep a similar pattern but at **reduced intensity**, highlighting a different operational regime.
+        - Weekday daytimes (especially Tuesday - Thursday) concentrate the **highest export levels**, reflecting strong industrial and commercial activity in neighbouring systems.  
+        - Nights (roughly 00:00 - 06:00) are flatter, with more modest exchanges, as overall European demand is lower.  
+        - Weekends keep a similar pattern but at **reduced intensity**, highlighting a different operational regime.
 
-    This view is particularly useful for **operations and forecasting**, as it captures the “typical week” behaviour of cross-border flows.
-    """)
+        This view is particularly useful for **operations and forecasting**, as it captures the “typical week” behaviour of cross-border flows.
+        """)
 
 
 
-    # 4) Partner correlation matrix
-    partner_cols = [c for c in base.columns if c.startswith("net_") and c not in ("net_total",)]
-    
-    if partner_cols:
-        corr = base[partner_cols].corr()
+        # 4) Partner correlation matrix
+        if partner_cols:
+            corr = partner_correlation(start_date, end_date)
     
-        fig_corr = px.imshow(corr, text_auto=True, aspect="auto", title="Correlation Between Partners' Net Balances")
+            fig_corr = px.imshow(corr, text_auto=True, aspect="auto", title="Correlation Between Partners' Net Balances")
         
-        fig_corr.update_layout(
-            title_font=dict(size=26)
-        )
+            fig_corr.update_layout(
+                title_font=dict(size=26)
+            )
     
-        st.plotly_chart(fig_corr, use_container_width=True)
+            st.plotly_chart(fig_corr, use_container_width=True)
     
-        st.markdown("""
-        **Analysis — Partner Correlations**  
-        This matrix measures how **bilateral net balances move together** over time.
-
-        - **Positive correlations** mean that flows with two partners tend to **co-move** (for example, both importing from France during similar situations).  
-        - **Low or near-zero correlations** indicate that exchanges are driven by **distinct local conditions**, providing diversification in France’s cross-border profile.  
-        - Any negative correlation would point to **substitution effects**, where France diverts flows from one border to another.
-
-        Overall, this chart helps assess whether France's external position is driven by a **single dominant border** or by a **diversified set of relationships**.
-        """)
-
-
-    # 5) Export vs import scatter
-    exp_cols0 = [c for c in base.columns if c.startswith("FR vers")]
-
-    imp_cols0 = [c for c in base.columns if c.endswith("vers FR (MWh)") or "->FR" in c]
-
-    if exp_cols0 and imp_cols0:
-        base["export_sum"] = base[exp_cols0].sum(axis=1)
-        base["import_sum"] = base[imp_cols0].sum(axis=1)
-        sample_n = min(len(base), 20000)
-
-        # Sample for readability
-        sample = base.sample(sample_n, random_state=0)
-
-        # Scatter with OLS trendline + opacity for dense clouds
-        fig_scatter = px.scatter(
-            sample,
-            x="import_sum",
-            y="export_sum",
-            trendline="ols",
-            opacity=0.4,  # 🔹 transparency on points
-            labels={"import_sum": "Import (MWh)", "export_sum": "Export (MWh)"},
-            title="Export vs Import (Sampled)"
-        )
+            st.markdown("""
+            **Analysis — Partner Correlations**  
+            This matrix measures how **bilateral net balances move together** over time.
+
+            - **Positive correlations** mean that flows with two partners tend to **co-move** (for example, both importing from France during similar situations).  
+            - **Low or near-zero correlations** indicate that exchanges are driven by **distinct local conditions**, providing diversification in France’s cross-border profile.  
+            - Any negative correlation would point to **substitution effects**, where France diverts flows from one border to another.
+
+            Overall, this chart helps assess whether France's external position is driven by a **single dominant border** or by a **diversified set of relationships**.
+            """)
+
+
+        # 5) Export vs import scatter
+        if exp_cols and imp_cols:
+            # Deterministic stride sample (<= 20000 rows) for readability; a step sharing
+            # a factor with 24 would keep only some hours of the day with hourly data
+            step = max(1, math.ceil(len(df_f) / 20000))
+            while step > 1 and math.gcd(step, 24) > 1:
+                step += 1
+
+            # One row-major float32 block (imports then exports): each row sum is a contiguous pass
+            flows = np.ascontiguousarray(df_f.iloc[::step][imp_cols + exp_cols].to_numpy(dtype=np.float32))
+            sample = pd.DataFrame({
+                "import_sum": np.nansum(flows[:, :len(imp_cols)], axis=1, dtype=np.float64),
+                "export_sum": np.nansum(flows[:, len(imp_cols):], axis=1, dtype=np.float64),
+            })
+
+            # Scatter with OLS trendline + opacity for dense clouds
+            fig_scatter = px.scatter(
+                sample,
+                x="import_sum",
+                y="export_sum",
+                trendline="ols",
+                opacity=0.4,  # 🔹 transparency on points
+                render_mode="webgl",  # scattergl: GPU-drawn cloud instead of one SVG node per point
+                labels={"import_sum": "Import (MWh)", "export_sum": "Export (MWh)"},
+                title="Export vs Import (Sampled)"
+            )
         
-        fig_scatter.update_layout(
-            title_font=dict(size=26)
-        )
+            fig_scatter.update_layout(
+                title_font=dict(size=26)
+            )
 
-        # Customize traces: red trendline + custom hover
-        for trace in fig_scatter.data:
+            # Customize traces: red trendline + custom hover
             # Points
-            if trace.mode == "markers":
-                trace.hovertemplate = (
+            fig_scatter.update_traces(
+                selector=dict(mode="markers"),
+                hovertemplate=(
                     "Import: %{x:.0f} MWh<br>"
                     "Export: %{y:.0f} MWh<br>"
                     "<extra></extra>"
-                )
+                ),
+            )
             # Trendline (OLS line)
-            elif trace.mode == "lines":
-                trace.line.color = "red"
-                trace.line.width = 3
-                trace.hovertemplate = (
+            fig_scatter.update_traces(
+                selector=dict(mode="lines"),
+                line=dict(color="red", width=3),
+                hovertemplate=(
                     "OLS trendline<br>"
                     "Import: %{x:.0f} MWh<br>"
                     "Export (fit): %{y:.0f} MWh<br>"
                     "<extra></extra>"
-                )
+                ),
+            )
 
-        st.plotly_chart(fig_scatter, use_container_width=True)
+            st.plotly_chart(fig_scatter, use_container_width=True)
 
-    st.markdown("""
-    **Analysis — Export vs Import Relationship**  
-    Each point represents one period (depending on the chosen aggregation) with its **total imports** on the x-axis and **total exports** on the y-axis.
+        st.markdown("""
+        **Analysis — Export vs Import Relationship**  
+        Each point represents one period (depending on the chosen aggregation) with its **total imports** on the x-axis and **total exports** on the y-axis.
 
-    - The cloud of points shows how France simultaneously participates in **supplying neighbours** and **covering its own needs**.  
-    - Points **above the diagonal** correspond to situations where exports dominate; points closer to the bottom-right reflect **high import episodes**.  
-    - The red **trendline** summarises the structural relationship between imports and exports and reveals how this balance behaves on average.
+        - The cloud of points shows how France simultaneously participates in **supplying neighbours** and **covering its own needs**.  
+        - Points **above the diagonal** correspond to situations where exports dominate; points closer to the bottom-right reflect **high import episodes**.  
+        - The red **trendline** summarises the structural relationship between imports and exports and reveals how this balance behaves on average.
 
-    This chart is useful to understand whether France acts more as a **flexible hub** or as a **one-sided exporter** in the selected period.
-    """)
+        This chart is useful to understand whether France acts more as a **flexible hub** or as a **one-sided exporter** in the selected period.
+        """)
 
 
-    # 6) Rolling 7-day average
-    roll = (df_f.set_index("datetime")["net_total"]
-            .resample("D").sum()
-            .rolling(7, min_periods=1).mean()
-            .reset_index())
+        # 6) Rolling 7-day average
+        roll = rolling_net(start_date, end_date)
     
-    fig_roll = px.line(roll, x="datetime", y="net_total",
-                    title="Net Balance — 7-Day Rolling Average")
+        fig_roll = px.line(m4_downsample(roll, "net_total"), x="datetime", y="net_total",
+                        title="Net Balance — 7-Day Rolling Average")
     
-    fig_roll.update_layout(
-        title_font=dict(size=26)
-    )
+        fig_roll.update_layout(
+            title_font=dict(size=26)
+        )
     
-    st.plotly_chart(fig_roll, use_container_width=True)
+        st.plotly_chart(fig_roll, use_container_width=True)
     
-    st.markdown("""
-    **Analysis — Smoothed Trend (7-Day Average)**  
-    The 7-day rolling mean filters out **short-term noise** to reveal **medium-term structural movements**.
+        st.markdown("""
+        **Analysis — Smoothed Trend (7-Day Average)**  
+        The 7-day rolling mean filters out **short-term noise** to reveal **medium-term structural movements**.
 
-    - Long stretches well **above zero** correspond to periods where France consistently exports electricity over several weeks.  
-    - Persistent dips or long episodes **below zero** indicate **sustained import dependence**, often associated with major supply issues or exceptional demand.  
-    - The sharp collapse around 2021-2022, followed by a recovery, clearly shows a **regime change** in the underlying system.
+        - Long stretches well **above zero** correspond to periods where France consistently exports electricity over several weeks.  
+        - Persistent dips or long episodes **below zero** indicate **sustained import dependence**, often associated with major supply issues or exceptional demand.  
+        - The sharp collapse around 2021-2022, followed by a recovery, clearly shows a **regime change** in the underlying system.
 
-    This smoothed series is ideal for tracking **shifts in structural regime**, rather than focusing on individual days.
-    """)
+        This smoothed series is ideal for tracking **shifts in structural regime**, rather than focusing on individual days.
+        """)
 
 
-    # 7) Top days
-    daily = df_f.set_index("datetime")["net_total"].resample("D").sum().reset_index()
+        # 7) Top days
+        daily = daily_net(start_date, end_date)
     
-    top_exp = daily.sort_values("net_total", ascending=False).head(10).rename(columns={"net_total":"MWh"}).assign(Type="Top export")
+        top_exp = daily.nlargest(10, "net_total").rename(columns={"net_total":"MWh"}).assign(Type="Top export")
     
-    top_imp = daily.sort_values("net_total", ascending=True).head(10).rename(columns={"net_total":"MWh"}).assign(Type="Top import")
+        top_imp = daily.nsmallest(10, "net_total").rename(columns={"net_total":"MWh"}).assign(Type="Top import")
     
-    st.subheader("Top Days")
+        st.subheader("Top Days")
     
-    st.dataframe(pd.concat([top_exp, top_imp]).sort_values(["Type","MWh"], ascending=[True, False]))
+        st.dataframe(pd.concat([top_exp, top_imp]).sort_values(["Type","MWh"], ascending=[True, False]))
     
-    st.markdown("""
-    **Analysis — Noteworthy Days**  
-    These tables list the **10 strongest export days** and **10 strongest import days** over the selected period.
+        st.markdown("""
+        **Analysis — Noteworthy Days**  
+        These tables list the **10 strongest export days** and **10 strongest import days** over the selected period.
 
-    - Extreme **export days** often correspond to situations of abundant French generation and favourable market conditions in neighbouring countries.  
-    - Extreme **import days** are typically associated with **system stress** (high demand, reduced nuclear availability, unexpected outages or regional price spikes).  
+        - Extreme **export days** often correspond to situations of abundant French generation and favourable market conditions in neighbouring countries.  
+        - Extreme **import days** are typically associated with **system stress** (high demand, reduced nuclear availability, unexpected outages or regional price spikes).  
 
-    These dates are prime candidates for **deep-dive investigations**, for example by cross-checking weather conditions, market prices or major grid events.
-    """)
+        These dates are prime candidates for **deep-dive investigations**, for example by cross-checking weather conditions, market prices or major grid events.
+        """)
 
 # ----------------------
 # 🗺️ Geo Flows (Maps)
 # ----------------------
-with tab_geo:
-    st.subheader("Geo View — France as a Regional Power Hub")
-
-    geo_base = df_f.copy()
-
-    partner_cols = [
-        c for c in geo_base.columns
-        if c.startswith("net_") and c not in ("net_total",)
-    ]
-
-    iso_map = {
-        "GBR": "GBR",
-        "CHE": "CHE",
-        "ITA": "ITA",
-        "ESP": "ESP",
-    }
-
-    if partner_cols:
-        # --------------------------
-        # Map 1 — Annual net balance per year
-        # --------------------------
-        yearly = (
-            geo_base
-            .groupby("year")[partner_cols]
-            .sum()
-            .reset_index()
-        )
-
-        yearly_long = (
-            yearly
-            .melt(id_vars="year", var_name="Partner_raw", value_name="MWh")
-        )
-
-        # net_GBR -> GBR
-        yearly_long["Partner"] = yearly_long["Partner_raw"].str.replace("net_", "", regex=False)
-
-        yearly_long = yearly_long[yearly_long["Partner"].isin(iso_map.keys())].copy()
-        yearly_long["iso_code"] = yearly_long["Partner"].map(iso_map)
-
-        yearly_long["Status"] = np.where(
-            yearly_long["MWh"] >= 0,
-            "Net exporter",
-            "Net importer"
-        )
-
-        fig_geo_year = px.choropleth(
-            yearly_long,
-            locations="iso_code",
-            color="MWh",
-            hover_name="Partner",
-            hover_data={"year": True, "Status": True, "iso_code": False},
-            animation_frame="year",
-            projection="natural earth",
-            title="Net Cross-Border Balance by Partner (Yearly View)",
-        )
-
-        fig_geo_year.update_layout(
-            title_font=dict(size=26),
-            margin=dict(l=0, r=0, t=60, b=0)
-        )
-
-        st.plotly_chart(fig_geo_year, use_container_width=True)
-
-        st.markdown(
-            """
-            **Analysis — Yearly Net Balance by Neighbour**  
-            This map shows, year by year, whether France is a **net exporter** or **net importer**
-            vis-à-vis each neighbouring country.
-
-            - Countries in **positive shades** are **net buyers** of French electricity in that year.  
-            - Countries in **negative shades** are **net suppliers** to France, reflecting periods of **import dependence**.  
-            - Sliding through the years reveals how these relationships evolve, especially around **stress episodes**
-                like the 2021 - 2022 nuclear outages.
-
-            It turns the time series into a **geographical narrative**:
-            *“In a given year, who relies on whom?”*
-            """
-        )
-
-        st.markdown("---")
-
-        # --------------------------
-        # MAp 2 — Net position over the selected period
-        # --------------------------
-        total_net = (
-            geo_base[partner_cols]
-            .sum()
-            .reset_index()
-        )
-        total_net.columns = ["Partner_raw", "MWh"]
-        total_net["Partner"] = total_net["Partner_raw"].str.replace("net_", "", regex=False)
-
-        total_net = total_net[total_net["Partner"].isin(iso_map.keys())].copy()
-        total_net["iso_code"] = total_net["Partner"].map(iso_map)
-        total_net["Status"] = np.where(
-            total_net["MWh"] >= 0,
-            "Net exporter (over selected period)",
-            "Net importer (over selected period)"
-        )
-
-        fig_geo_total = px.choropleth(
-            total_net,
-            locations="iso_code",
-            color="MWh",
-            hover_name="Partner",
-            hover_data={"Status": True, "iso_code": False},
-            projection="natural earth",
-            title="Net Cross-Border Balance by Partner (Selected Period)",
-        )
-
-        fig_geo_total.update_layout(
-            title_font=dict(size=26),
-            margin=dict(l=0, r=0, t=60, b=0)
-        )
-
-        st.plotly_chart(fig_geo_total, use_container_width=True)
-
-        st.markdown(
-            """
-            **Analysis — Net Position Over the Selected Period**  
-            Here, each country is aggregated over the **entire date range** chosen in the sidebar.
-
-            - Partners with **strong positive balances** are those that **consistently buy** from France
-                across the period.  
-            - Negative balances highlight borders where France has been **structurally dependent on imports**.  
-            - Comparing this map with the yearly animation helps distinguish **short-lived crises**
-              from **long-lasting structural shifts**.
-
-            This view answers:  
-            *“Over the whole period I'm looking at, who is France really exporting to, and who is it relying on?”*
-            """
-        )
-
-        st.markdown("---")
-
-        # --------------------------
-        # Map 3 — Structural intensity (absolute flows)
-        # --------------------------
-        total_abs = (
-            geo_base[partner_cols]
-            .abs()
-            .sum()
-            .reset_index()
-        )
-        total_abs.columns = ["Partner_raw", "Abs_MWh"]
-        total_abs["Partner"] = total_abs["Partner_raw"].str.replace("net_", "", regex=False)
-
-        total_abs = total_abs[total_abs["Partner"].isin(iso_map.keys())].copy()
-        total_abs["iso_code"] = total_abs["Partner"].map(iso_map)
-
-        fig_geo_intensity = px.choropleth(
-            total_abs,
-            locations="iso_code",
-            color="Abs_MWh",
-            hover_name="Partner",
-            projection="natural earth",
-            title="Structural Intensity of Cross-Border Exchanges (Selected Period)",
-        )
-
-        fig_geo_intensity.update_layout(
-            title_font=dict(size=26),
-            margin=dict(l=0, r=0, t=60, b=0)
-        )
-
-        st.plotly_chart(fig_geo_intensity, use_container_width=True)
-
-        st.markdown(
-            """
-            **Analysis — Structural Intensity of Exchanges**  
-            This third map ignores the **sign** of the flows and focuses on their **absolute volume**.
-
-            - Darker shades indicate borders with **high structural exposure** — large volumes traded
-                in both export and import directions.  
-            - Lighter countries correspond to **second-order borders**, which matter less for France’s
-                overall external balancing.  
-
-            Together, the three maps tell a coherent story:
-
-            - The **yearly map** captures the *trajectory* of each relationship over time.  
-            - The **net position map** summarises **who France depends on** over the selected period.  
-            - The **intensity map** highlights **which borders are systemically critical**, regardless of direction.
-            """
-        )
-
-    else:
-        st.info("No partner-level `net_*` columns available to build geographic views.")
+if tab_is_open(tab_geo):
+    with tab_geo:
+        st.subheader("Geo View — France as a Regional Power Hub")
+
+        iso_map = {
+            "GBR": "GBR",
+            "CHE": "CHE",
+            "ITA": "ITA",
+            "ESP": "ESP",
+        }
+
+        if partner_cols:
+            # --------------------------
+            # Map 1 — Annual net balance per year
+            # --------------------------
+            yearly = yearly_partner_nets(start_date, end_date)
+
+            # net_GBR -> GBR on the column labels, before the melt multiplies them per year
+            yearly_long = (
+                yearly
+                .rename(columns={c: c[4:] for c in partner_cols})
+                .melt(id_vars="year", var_name="Partner", value_name="MWh")
+            )
+
+            yearly_long = yearly_long[yearly_long["Partner"].isin(iso_map.keys())].copy()
+            yearly_long["iso_code"] = yearly_long["Partner"].map(iso_map)
+
+            yearly_long["Status"] = np.where(
+                yearly_long["MWh"] >= 0,
+                "Net exporter",
+                "Net importer"
+            )
+
+            fig_geo_year = px.choropleth(
+                yearly_long,
+                locations="iso_code",
+                color="MWh",
+                hover_name="Partner",
+                hover_data={"year": True, "Status": True, "iso_code": False},
+                animation_frame="year",
+                projection="natural earth",
+                title="Net Cross-Border Balance by Partner (Yearly View)",
+            )
+
+            fig_geo_year.update_layout(
+                title_font=dict(size=26),
+                margin=dict(l=0, r=0, t=60, b=0)
+            )
+
+            st.plotly_chart(fig_geo_year, use_container_width=True)
+
+            st.markdown(
+                """
+                **Analysis — Yearly Net Balance by Neighbour**  
+                This map shows, year by year, whether France is a **net exporter** or **net importer**
+                vis-à-vis each neighbouring country.
+
+                - Countries in **positive shades** are **net buyers** of French electricity in that year.  
+                - Countries in **negative shades** are **net suppliers** to France, reflecting periods of **import dependence**.  
+                - Sliding through the years reveals how these relationships evolve, especially around **stress episodes**
+                    like the 2021 - 2022 nuclear outages.
+
+                It turns the time series into a **geographical narrative**:
+                *“In a given year, who relies on whom?”*
+                """
+            )
+
+            st.markdown("---")
+
+            # --------------------------
+            # MAp 2 — Net position over the selected period
+            # --------------------------
+            # Period totals from the cached per-year table (a handful of rows)
+            total_net = (
+                yearly[partner_cols]
+                .sum()
+                .reset_index()
+            )
+            total_net.columns = ["Partner_raw", "MWh"]
+            total_net["Partner"] = total_net["Partner_raw"].str.slice(4)
+
+            total_net = total_net[total_net["Partner"].isin(iso_map.keys())].copy()
+            total_net["iso_code"] = total_net["Partner"].map(iso_map)
+            total_net["Status"] = np.where(
+                total_net["MWh"] >= 0,
+                "Net exporter (over selected period)",
+                "Net importer (over selected period)"
+            )
+
+            fig_geo_total = px.choropleth(
+                total_net,
+                locations="iso_code",
+                color="MWh",
+                hover_name="Partner",
+                hover_data={"Status": True, "iso_code": False},
+                projection="natural earth",
+                title="Net Cross-Border Balance by Partner (Selected Period)",
+            )
+
+            fig_geo_total.update_layout(
+                title_font=dict(size=26),
+                margin=dict(l=0, r=0, t=60, b=0)
+            )
+
+            st.plotly_chart(fig_geo_total, use_container_width=True)
+
+            st.markdown(
+                """
+                **Analysis — Net Position Over the Selected Period**  
+                Here, each country is aggregated over the **entire date range** chosen in the sidebar.
+
+                - Partners with **strong positive balances** are those that **consistently buy** from France
+                    across the period.  
+                - Negative balances highlight borders where France has been **structurally dependent on imports**.  
+                - Comparing this map with the yearly animation helps distinguish **short-lived crises**
+                  from **long-lasting structural shifts**.
+
+                This view answers:  
+                *“Over the whole period I'm looking at, who is France really exporting to, and who is it relying on?”*
+                """
+            )
+
+            st.markdown("---")
+
+            # --------------------------
+            # Map 3 — Structural intensity (absolute flows)
+            # --------------------------
+            total_abs = partner_abs_totals(start_date, end_date).reset_index()
+            total_abs.columns = ["Partner_raw", "Abs_MWh"]
+            total_abs["Partner"] = total_abs["Partner_raw"].str.slice(4)
+
+            total_abs = total_abs[total_abs["Partner"].isin(iso_map.keys())].copy()
+            total_abs["iso_code"] = total_abs["Partner"].map(iso_map)
+
+            fig_geo_intensity = px.choropleth(
+                total_abs,
+                locations="iso_code",
+                color="Abs_MWh",
+                hover_name="Partner",
+                projection="natural earth",
+                title="Structural Intensity of Cross-Border Exchanges (Selected Period)",
+            )
+
+            fig_geo_intensity.update_layout(
+                title_font=dict(size=26),
+                margin=dict(l=0, r=0, t=60, b=0)
+            )
+
+            st.plotly_chart(fig_geo_intensity, use_container_width=True)
+
+            st.markdown(
+                """
+                **Analysis — Structural Intensity of Exchanges**  
+                This third map ignores the **sign** of the flows and focuses on their **absolute volume**.
+
+                - Darker shades indicate borders with **high structural exposure** — large volumes traded
+                    in both export and import directions.  
+                - Lighter countries correspond to **second-order borders**, which matter less for France’s
+                    overall external balancing.  
+
+                Together, the three maps tell a coherent story:
+
+                - The **yearly map** captures the *trajectory* of each relationship over time.  
+                - The **net position map** summarises **who France depends on** over the selected period.  
+                - The **intensity map** highlights **which borders are systemically critical**, regardless of direction.
+                """
+            )
+
+        else:
+            st.info("No partner-level `net_*` columns available to build geographic views.")
 
 
 # ----------------------
@@ -762,85 +1139,82 @@ with tab_geo:
 # --------------------------------------------------
 # 🧭 Methodology, Data Quality & Insights
 # --------------------------------------------------
-with tab_meth:
-    st.markdown(
-        """
-        ### Data Pipeline & Assumptions
-
-        **Data pipeline**
-
-        1. **Raw data (outside this app)**  
-        Original file with cross-border commercial flows (hourly exchanges between France and its neighbors).  
-        2. **Pre-processing (notebook or ETL script)**  
-        - Construction of a unified `datetime` from calendar date + program hour.  
-        - Computation of partner-level net flows (`net_GBR`, `net_CHE`, `net_ITA`, `net_ESP`, `net_CWE`)  
-            as **France exports - France imports** (in MWh).  
-        - Computation of the overall `net_total` (either direct or as a sum of net partners).  
-        - Enrichment with temporal features: `year`, `month`, `day`, `hour`, etc.  
-        → Output: **`processed-imports-exports.csv`**.  
-        3. **This Streamlit app (`app.py`)**  
-        - Loads the processed dataset only.  
-        - Performs **light aggregations** (hourly / daily / weekly / monthly).  
-        - Provides **interactive visual analytics** and narrative interpretations.
-
-        **Core assumptions**
-
-        - `net_*` for each partner = **Exports from France - Imports to France**, in MWh.  
-        - `net_total` = `Export France (MWh)` - `Import France (MWh)` (or equivalent).  
-        - Aggregations (D/W/M) are performed by **summing** net flows and volumes over the period.
-        """
-    )
+if tab_is_open(tab_meth):
+    with tab_meth:
+        st.markdown(
+            """
+            ### Data Pipeline & Assumptions
+
+            **Data pipeline**
+
+            1. **Raw data (outside this app)**  
+            Original file with cross-border commercial flows (hourly exchanges between France and its neighbors).  
+            2. **Pre-processing (notebook or ETL script)**  
+            - Construction of a unified `datetime` from calendar date + program hour.  
+            - Computation of partner-level net flows (`net_GBR`, `net_CHE`, `net_ITA`, `net_ESP`, `net_CWE`)  
+                as **France exports - France imports** (in MWh).  
+            - Computation of the overall `net_total` (either direct or as a sum of net partners).  
+            - Enrichment with temporal features: `year`, `month`, `day`, `hour`, etc.  
+            → Output: **`processed-imports-exports.csv`**.  
+            3. **This Streamlit app (`app.py`)**  
+            - Loads the processed dataset only.  
+            - Performs **light aggregations** (hourly / daily / weekly / monthly).  
+            - Provides **interactive visual analytics** and narrative interpretations.
+
+            **Core assumptions**
+
+            - `net_*` for each partner = **Exports from France - Imports to France**, in MWh.  
+            - `net_total` = `Export France (MWh)` - `Import France (MWh)` (or equivalent).  
+            - Aggregations (D/W/M) are performed by **summing** net flows and volumes over the period.
+            """
+        )
 
-    # Data Quality & coverage
-    st.markdown("### Data Quality & Limitations")
-
-    st.markdown("#### Duplicates & coverage")
-
-    nb_dups = df.duplicated().sum()
-    min_dt = df["datetime"].min()
-    max_dt = df["datetime"].max()
-    min_net = df["net_total"].min()
-    max_net = df["net_total"].max()
-
-    st.write(f"- Number of duplicated rows: **{nb_dups}**")
-    st.write(f"- Time period covered: **{min_dt} → {max_dt}**")
-    st.write(f"- Minimum net balance: **{format_mwh(min_net)}**")
-    st.write(f"- Maximum net balance: **{format_mwh(max_net)}**")
-
-    st.markdown(
-        """
-        #### Known limitations / potential biases
-
-        - Timestamps are based on the **exchange program schedule**, which may differ slightly
-        from real-time physical flows.  
-        - The source (TSO / open data portal) may apply **ex-post corrections** to the historical series.  
-        - Aggregations (from hourly to monthly) can mask **very short-term spikes** or intraday events.  
-        - The dataset focuses on **commercial flows** and does not directly capture prices,
-        redispatching actions, or detailed grid constraints.
-        """
-    )
+        # Data Quality & coverage
+        st.markdown("### Data Quality & Limitations")
 
-    # Key Insights & Next Steps
-    st.markdown("### Key Insights & Next Steps")
-
-    st.success(
-        """
-        **Key insights**  
-
-        - Over the analysed period, France appears to be **structurally net exporting**, with specific
-            episodes of **high imports** (often in winter during demand peaks).  
-        - Some partners (e.g., **GBR**, **CHE**, **ITA**, **ESP**, **CWE/Core**) play a major role in
-            balancing France's surplus/deficit, with clear asymmetries in net flows.  
-        - **Intra-day patterns** (Day x Hour heatmap) reveal recurring periods of strong exports or imports,
-            especially around peak-load hours.
-
-        **Retrospective & Future prospects**
-
-        - Enrich this analysis with **market prices** (day-ahead, intraday) to assess the **economic value**
-            of cross-border exchanges.  
-        - Combine with **weather data** (temperature, wind, hydro inflows) to better understand how
-            generation mix and demand drive cross-border flows.  
-        - Extend the comparison to additional European countries or zones to benchmark France's structural
-            position in the interconnected system.  
-        """
-    )
+        st.markdown("#### Duplicates & coverage")
+
+        stats = dataset_stats(DATA_PATH)
+
+        st.write(f"- Number of duplicated rows: **{stats['nb_dups']}**")
+        st.write(f"- Time period covered: **{stats['min_dt']} → {stats['max_dt']}**")
+        st.write(f"- Minimum net balance: **{format_mwh(stats['min_net'])}**")
+        st.write(f"- Maximum net balance: **{format_mwh(stats['max_net'])}**")
+
+        st.markdown(
+            """
+            #### Known limitations / potential biases
+
+            - Timestamps are based on the **exchange program schedule**, which may differ slightly
+            from real-time physical flows.  
+            - The source (TSO / open data portal) may apply **ex-post corrections** to the historical series.  
+            - Aggregations (from hourly to monthly) can mask **very short-term spikes** or intraday events.  
+            - The dataset focuses on **commercial flows** and does not directly capture prices,
+            redispatching actions, or detailed grid constraints.
+            """
+        )
+
+        # Key Insights & Next Steps
+        st.markdown("### Key Insights & Next Steps")
+
+        st.success(
+            """
+            **Key insights**  
+
+            - Over the analysed period, France appears to be **structurally net exporting**, with specific
+                episodes of **high imports** (often in winter during demand peaks).  
+            - Some partners (e.g., **GBR**, **CHE**, **ITA**, **ESP**, **CWE/Core**) play a major role in
+                balancing France's surplus/deficit, with clear asymmetries in net flows.  
+            - **Intra-day patterns** (Day x Hour heatmap) reveal recurring periods of strong exports or imports,
+                especially around peak-load hours.
+
+            **Retrospective & Future prospects**
+
+            - Enrich this analysis with **market prices** (day-ahead, intraday) to assess the **economic value**
+                of cross-border exchanges.  
+            - Combine with **weather data** (temperature, wind, hydro inflows) to better understand how
+                generation mix and demand drive cross-border flows.  
+            - Extend the comparison to additional European countries or zones to benchmark France's structural
+                position in the interconnected system.  
+            """
+        )